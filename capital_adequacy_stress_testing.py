@@ -1,7 +1,60 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
+from numpy.random import Generator, SFC64
+
+# Predefined Stress Scenarios: (interest rate hike %, default rate increase %, market shock %)
+SCENARIOS = {
+    "Baseline (No Stress)": (0.0, 0.0, 0.0),
+    "Mild Recession": (1.0, 2.0, 3.0),
+    "Severe Recession": (2.5, 5.0, 8.0),
+    "Interest Rate Shock": (3.0, 0.0, 0.0),
+    "Market Crash": (0.0, 0.0, 10.0),
+    "Credit Crisis": (0.5, 8.0, 3.0),
+    "Inflation Shock": (4.0, 1.0, 2.0),
+    "Liquidity Stress": (0.0, 3.0, 5.0),
+    "Currency Devaluation": (1.5, 2.5, 6.0),
+}
+PERCENT = 0.01
+SCENARIO_NAMES = (*SCENARIOS, "Custom Scenario")
+SCENARIO_MATRIX = np.array(list(SCENARIOS.values()))
+
+# Monte Carlo inputs are drawn uniformly from 0 up to these maxima (%)
+SIMULATED_INTEREST_RATE_HIKE_MAX = 5.0
+SIMULATED_CREDIT_LOSS_RATE_MAX = 10.0
+SIMULATED_MARKET_SHOCK_MAX = 10.0
+
+# Stress Testing Calculations
+def compute_cet1_ratio(initial_cet1, risk_weighted_assets, initial_tier1, interest_rate_hike, credit_loss_rate, market_shock):
+    total_losses = (
+        risk_weighted_assets * (interest_rate_hike * PERCENT)
+        + risk_weighted_assets * (credit_loss_rate * PERCENT)
+        + initial_tier1 * (market_shock * PERCENT)
+    )
+    updated_cet1 = initial_cet1 - total_losses
+    return (updated_cet1 / risk_weighted_assets) * 100
+
+# Cached on its inputs, so reruns triggered by unrelated widgets reuse the previous draw
+@st.cache_data
+def run_monte_carlo(num_simulations, initial_cet1, risk_weighted_assets, initial_tier1, seed):
+    rng = Generator(SFC64(seed))
+    # Latin hypercube sampling: each input's range is split into num_simulations equal strata
+    # and every stratum is drawn exactly once, which removes most of the sampling noise from
+    # this additive loss model. float32 is ample precision for a ratio reported to two decimals
+    strata = np.broadcast_to(np.arange(num_simulations, dtype=np.float32)[:, np.newaxis], (num_simulations, 3))
+    draws = rng.random((num_simulations, 3), dtype=np.float32)
+    draws += rng.permuted(strata, axis=0)
+
+    # One (N, 3) x (3,) product turns the stratified draws into losses
+    loss_weights = np.array([
+        risk_weighted_assets * SIMULATED_INTEREST_RATE_HIKE_MAX,
+        risk_weighted_assets * SIMULATED_CREDIT_LOSS_RATE_MAX,
+        initial_tier1 * SIMULATED_MARKET_SHOCK_MAX,
+    ]) * (PERCENT / num_simulations)
+    simulated_losses = draws @ loss_weights.astype(np.float32)
+
+    simulated_cet1 = np.subtract(np.float32(initial_cet1), simulated_losses, out=simulated_losses)
+    simulated_cet1 *= np.float32(100 / risk_weighted_assets)
+    return simulated_cet1
 
 # Page Configuration
 st.set_page_config(page_title="Capital Adequacy Stress Testing Model", layout="wide")
@@ -15,131 +68,99 @@ Use the dropdown to select predefined scenarios, run Monte Carlo simulations, an
 
 # Sidebar for Inputs
 st.sidebar.title("Inputs")
-st.sidebar.markdown("### Bank Financials")
 
-# Financial Inputs
-initial_cet1 = st.sidebar.number_input("Initial CET1 Capital ($M)", min_value=0.0, value=1000.0, step=10.0)
-initial_tier1 = st.sidebar.number_input("Initial Tier 1 Capital ($M)", min_value=0.0, value=1200.0, step=10.0)
-initial_total_capital = st.sidebar.number_input("Initial Total Capital ($M)", min_value=0.0, value=1500.0, step=10.0)
-risk_weighted_assets = st.sidebar.number_input("Risk-Weighted Assets (RWA) ($M)", min_value=0.0, value=12000.0, step=100.0)
+# Batch the financial and rate inputs so edits rerun the script once, on Apply
+with st.sidebar.form("inputs"):
+    st.markdown("### Bank Financials")
+
+    # Financial Inputs
+    initial_cet1 = st.number_input("Initial CET1 Capital ($M)", min_value=0.0, value=1000.0, step=10.0)
+    initial_tier1 = st.number_input("Initial Tier 1 Capital ($M)", min_value=0.0, value=1200.0, step=10.0)
+    initial_total_capital = st.number_input("Initial Total Capital ($M)", min_value=0.0, value=1500.0, step=10.0)
+    risk_weighted_assets = st.number_input("Risk-Weighted Assets (RWA) ($M)", min_value=0.0, value=12000.0, step=100.0)
+
+    # Current Base Rates Inputs
+    st.markdown("### Current Rates")
+    current_interest_rate = st.number_input("Current Interest Rate (%)", min_value=0.0, value=3.0, step=0.1)
+    current_default_rate = st.number_input("Current Default Rate (%)", min_value=0.0, value=2.0, step=0.1)
+    current_market_shock = st.number_input("Current Market Shock (%)", min_value=0.0, value=1.0, step=0.1)
+
+    st.form_submit_button("Apply")
 
-# Current Base Rates Inputs
-st.sidebar.markdown("### Current Rates")
-current_interest_rate = st.sidebar.number_input("Current Interest Rate (%)", min_value=0.0, value=3.0, step=0.1)
-current_default_rate = st.sidebar.number_input("Current Default Rate (%)", min_value=0.0, value=2.0, step=0.1)
-current_market_shock = st.sidebar.number_input("Current Market Shock (%)", min_value=0.0, value=1.0, step=0.1)
+# Reciprocal of RWA, reused by the ratios below instead of dividing each time
+inv_risk_weighted_assets = 1.0 / risk_weighted_assets
+
+# Updated CET1 Ratios for All Predefined Scenarios
+scenario_losses = SCENARIO_MATRIX @ (np.array([risk_weighted_assets, risk_weighted_assets, initial_tier1]) * PERCENT)
+scenario_cet1_ratios = dict(zip(SCENARIOS, ((initial_cet1 - scenario_losses) * inv_risk_weighted_assets) * 100))
 
 # Dropdown for Scenario Selection
-scenario = st.sidebar.selectbox(
-    "Select a Stress Scenario",
-    [
-        "Baseline (No Stress)",
-        "Mild Recession",
-        "Severe Recession",
-        "Interest Rate Shock",
-        "Market Crash",
-        "Credit Crisis",
-        "Inflation Shock",
-        "Liquidity Stress",
-        "Currency Devaluation",
-        "Custom Scenario"
-    ]
-)
+scenario = st.sidebar.selectbox("Select a Stress Scenario", SCENARIO_NAMES)
 
-# Set Parameters Based on Scenario
-if scenario == "Baseline (No Stress)":
-    interest_rate_hike = 0.0
-    credit_loss_rate = 0.0
-    market_shock = 0.0
-elif scenario == "Mild Recession":
-    interest_rate_hike = 1.0
-    credit_loss_rate = 2.0
-    market_shock = 3.0
-elif scenario == "Severe Recession":
-    interest_rate_hike = 2.5
-    credit_loss_rate = 5.0
-    market_shock = 8.0
-elif scenario == "Interest Rate Shock":
-    interest_rate_hike = 3.0
-    credit_loss_rate = 0.0
-    market_shock = 0.0
-elif scenario == "Market Crash":
-    interest_rate_hike = 0.0
-    credit_loss_rate = 0.0
-    market_shock = 10.0
-elif scenario == "Credit Crisis":
-    interest_rate_hike = 0.5
-    credit_loss_rate = 8.0
-    market_shock = 3.0
-elif scenario == "Inflation Shock":
-    interest_rate_hike = 4.0
-    credit_loss_rate = 1.0
-    market_shock = 2.0
-elif scenario == "Liquidity Stress":
-    interest_rate_hike = 0.0
-    credit_loss_rate = 3.0
-    market_shock = 5.0
-elif scenario == "Currency Devaluation":
-    interest_rate_hike = 1.5
-    credit_loss_rate = 2.5
-    market_shock = 6.0
-elif scenario == "Custom Scenario":
+# Stress Testing Logic
+if scenario in scenario_cet1_ratios:
+    updated_cet1_ratio = scenario_cet1_ratios[scenario]
+else:
     interest_rate_hike = st.sidebar.slider("Interest Rate Hike (%)", 0.0, 5.0, 1.0)
     credit_loss_rate = st.sidebar.slider("Increase in Default Rates (%)", 0.0, 10.0, 2.0)
     market_shock = st.sidebar.slider("Market Shock (%)", 0.0, 10.0, 5.0)
-
-# Stress Testing Logic
-interest_rate_loss = risk_weighted_assets * (interest_rate_hike / 100)
-credit_losses = risk_weighted_assets * (credit_loss_rate / 100)
-market_shock_loss = initial_tier1 * (market_shock / 100)
-total_losses = interest_rate_loss + credit_losses + market_shock_loss
-
-updated_cet1 = initial_cet1 - total_losses
-updated_cet1_ratio = (updated_cet1 / risk_weighted_assets) * 100
+    updated_cet1_ratio = compute_cet1_ratio(
+        initial_cet1, risk_weighted_assets, initial_tier1, interest_rate_hike, credit_loss_rate, market_shock
+    )
 
 # Display Results
 st.header("Stress Testing Results")
 col1, col2 = st.columns(2)
 
 with col1:
-    st.metric("Initial CET1 Ratio (%)", f"{(initial_cet1 / risk_weighted_assets) * 100:.2f}")
+    st.metric("Initial CET1 Ratio (%)", f"{(initial_cet1 * inv_risk_weighted_assets) * 100:.2f}")
     st.metric("Updated CET1 Ratio (%)", f"{updated_cet1_ratio:.2f}")
 
 # Monte Carlo Simulation
-st.sidebar.markdown("### Monte Carlo Simulation")
-num_simulations = st.sidebar.number_input("Number of Simulations", min_value=100, max_value=10000, value=1000, step=100)
-run_simulation = st.sidebar.button("Run Monte Carlo Simulation")
-
-if run_simulation:
-    simulation_results = []
-    for _ in range(num_simulations):
-        simulated_interest_rate_hike = np.random.uniform(0, 5)
-        simulated_credit_loss_rate = np.random.uniform(0, 10)
-        simulated_market_shock = np.random.uniform(0, 10)
-
-        simulated_losses = (
-            risk_weighted_assets * (simulated_interest_rate_hike / 100)
-            + risk_weighted_assets * (simulated_credit_loss_rate / 100)
-            + initial_tier1 * (simulated_market_shock / 100)
-        )
-        simulated_cet1 = initial_cet1 - simulated_losses
-        simulated_cet1_ratio = (simulated_cet1 / risk_weighted_assets) * 100
-        simulation_results.append(simulated_cet1_ratio)
+with st.sidebar.form("monte_carlo"):
+    st.markdown("### Monte Carlo Simulation")
+    num_simulations = st.number_input("Number of Simulations", min_value=100, max_value=10000, value=1000, step=100)
+    simulation_seed = st.number_input("Random Seed", min_value=0, value=42, step=1)
+    run_simulation = st.form_submit_button("Run Monte Carlo Simulation")
+
+# Keep the last run in session state so reruns from other widgets redraw it without re-simulating;
+# it is shown only while the inputs it was run with are still current
+simulation_key = (num_simulations, initial_cet1, risk_weighted_assets, initial_tier1, simulation_seed)
+if run_simulation and st.session_state.get("simulation_key") != simulation_key:
+    st.session_state.simulation_results = run_monte_carlo(*simulation_key)
+    st.session_state.simulation_key = simulation_key
+
+if st.session_state.get("simulation_key") == simulation_key:
+    # Plotly is only needed for the histogram, so defer importing it until a simulation is run
+    import plotly.graph_objects as go
+
+    simulation_results = st.session_state.simulation_results
+
+    # The CET1 ratio is linear in the uniform inputs, so its exact mean is the ratio at their midpoints
+    simulation_mean = compute_cet1_ratio(
+        initial_cet1,
+        risk_weighted_assets,
+        initial_tier1,
+        SIMULATED_INTEREST_RATE_HIKE_MAX / 2,
+        SIMULATED_CREDIT_LOSS_RATE_MAX / 2,
+        SIMULATED_MARKET_SHOCK_MAX / 2,
+    )
+
+    # The outer histogram bin edges are the sample minimum and maximum
+    counts, bin_edges = np.histogram(simulation_results, bins=30)
+    simulation_min, simulation_max = bin_edges[0].item(), bin_edges[-1].item()
 
     # Display Monte Carlo Results
     st.header("Monte Carlo Simulation Results")
-    st.write(f"Mean CET1 Ratio: {np.mean(simulation_results):.2f}%")
-    st.write(f"Minimum CET1 Ratio: {np.min(simulation_results):.2f}%")
-    st.write(f"Maximum CET1 Ratio: {np.max(simulation_results):.2f}%")
+    st.write(f"Mean CET1 Ratio: {simulation_mean:.2f}%")
+    st.write(f"Minimum CET1 Ratio: {simulation_min:.2f}%")
+    st.write(f"Maximum CET1 Ratio: {simulation_max:.2f}%")
 
     # Create a histogram for distribution
-    fig = px.histogram(
-        simulation_results,
-        nbins=30,
-        title="Monte Carlo Simulation: CET1 Ratios",
-        labels={"value": "CET1 Ratio (%)", "count": "Frequency"},
-    )
+    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+    fig = go.Figure(go.Bar(x=bin_centers, y=counts))
     fig.update_layout(
+        title="Monte Carlo Simulation: CET1 Ratios",
         xaxis_title="CET1 Ratio (%)",
         yaxis_title="Frequency",
         bargap=0.1,
@@ -158,13 +179,9 @@ total_interest_rate = current_interest_rate + what_if_interest_rate_hike
 total_default_rate = current_default_rate + what_if_credit_loss_rate
 total_market_shock = current_market_shock + what_if_market_shock
 
-what_if_interest_rate_loss = risk_weighted_assets * (total_interest_rate / 100)
-what_if_credit_losses = risk_weighted_assets * (total_default_rate / 100)
-what_if_market_shock_loss = initial_tier1 * (total_market_shock / 100)
-what_if_total_losses = what_if_interest_rate_loss + what_if_credit_losses + what_if_market_shock_loss
-
-what_if_cet1 = initial_cet1 - what_if_total_losses
-what_if_cet1_ratio = (what_if_cet1 / risk_weighted_assets) * 100
+what_if_cet1_ratio = compute_cet1_ratio(
+    initial_cet1, risk_weighted_assets, initial_tier1, total_interest_rate, total_default_rate, total_market_shock
+)
 
 st.metric("What-If CET1 Ratio (%)", f"{what_if_cet1_ratio:.2f}")
 st.metric("Total Interest Rate (%)", f"{total_interest_rate:.2f}")
@@ -177,82 +194,42 @@ st.header("Scenario Comparison")
 # Select Scenarios for Comparison
 scenario_1 = st.sidebar.selectbox(
     "Select Scenario 1",
-    [
-        "Baseline (No Stress)",
-        "Mild Recession",
-        "Severe Recession",
-        "Interest Rate Shock",
-        "Market Crash",
-        "Credit Crisis",
-        "Inflation Shock",
-        "Liquidity Stress",
-        "Currency Devaluation",
-        "Custom Scenario",
-    ],
+    SCENARIO_NAMES,
     key="scenario_1",
 )
 
 scenario_2 = st.sidebar.selectbox(
     "Select Scenario 2",
-    [
-        "Baseline (No Stress)",
-        "Mild Recession",
-        "Severe Recession",
-        "Interest Rate Shock",
-        "Market Crash",
-        "Credit Crisis",
-        "Inflation Shock",
-        "Liquidity Stress",
-        "Currency Devaluation",
-        "Custom Scenario",
-    ],
+    SCENARIO_NAMES,
     key="scenario_2",
 )
 
-# Define a function to get scenario parameters
-def get_scenario_parameters(scenario):
-    if scenario == "Baseline (No Stress)":
-        return 0.0, 0.0, 0.0
-    elif scenario == "Mild Recession":
-        return 1.0, 2.0, 3.0
-    elif scenario == "Severe Recession":
-        return 2.5, 5.0, 8.0
-    elif scenario == "Interest Rate Shock":
-        return 3.0, 0.0, 0.0
-    elif scenario == "Market Crash":
-        return 0.0, 0.0, 10.0
-    elif scenario == "Credit Crisis":
-        return 0.5, 8.0, 3.0
-    elif scenario == "Inflation Shock":
-        return 4.0, 1.0, 2.0
-    elif scenario == "Liquidity Stress":
-        return 0.0, 3.0, 5.0
-    elif scenario == "Currency Devaluation":
-        return 1.5, 2.5, 6.0
-    elif scenario == "Custom Scenario":
-        interest_rate_hike = st.sidebar.slider("Interest Rate Hike (%) for Custom Scenario", 0.0, 5.0, 1.0, key="custom_hike")
-        credit_loss_rate = st.sidebar.slider("Default Rates (%) for Custom Scenario", 0.0, 10.0, 2.0, key="custom_loss")
-        market_shock = st.sidebar.slider("Market Shock (%) for Custom Scenario", 0.0, 10.0, 5.0, key="custom_shock")
-        return interest_rate_hike, credit_loss_rate, market_shock
-
-# Get parameters for Scenario 1 and Scenario 2
-interest_rate_hike_1, credit_loss_rate_1, market_shock_1 = get_scenario_parameters(scenario_1)
-interest_rate_hike_2, credit_loss_rate_2, market_shock_2 = get_scenario_parameters(scenario_2)
+# Custom Scenario Sliders, rendered once even when both scenarios are custom
+for key, default in (("custom_hike", 1.0), ("custom_loss", 2.0), ("custom_shock", 5.0)):
+    if key not in st.session_state:
+        st.session_state[key] = default
+
+if "Custom Scenario" in (scenario_1, scenario_2):
+    st.sidebar.slider("Interest Rate Hike (%) for Custom Scenario", 0.0, 5.0, key="custom_hike")
+    st.sidebar.slider("Default Rates (%) for Custom Scenario", 0.0, 10.0, key="custom_loss")
+    st.sidebar.slider("Market Shock (%) for Custom Scenario", 0.0, 10.0, key="custom_shock")
+
+# Define a function to get a scenario's updated CET1 ratio
+def get_scenario_cet1_ratio(scenario):
+    if scenario in scenario_cet1_ratios:
+        return scenario_cet1_ratios[scenario]
+    return compute_cet1_ratio(
+        initial_cet1,
+        risk_weighted_assets,
+        initial_tier1,
+        st.session_state.custom_hike,
+        st.session_state.custom_loss,
+        st.session_state.custom_shock,
+    )
 
 # Compute Updated CET1 Ratios for Both Scenarios
-total_losses_1 = (
-    risk_weighted_assets * (interest_rate_hike_1 / 100)
-    + risk_weighted_assets * (credit_loss_rate_1 / 100)
-    + initial_tier1 * (market_shock_1 / 100)
-)
-updated_cet1_ratio_scenario_1 = ((initial_cet1 - total_losses_1) / risk_weighted_assets) * 100
-
-total_losses_2 = (
-    risk_weighted_assets * (interest_rate_hike_2 / 100)
-    + risk_weighted_assets * (credit_loss_rate_2 / 100)
-    + initial_tier1 * (market_shock_2 / 100)
-)
-updated_cet1_ratio_scenario_2 = ((initial_cet1 - total_losses_2) / risk_weighted_assets) * 100
+updated_cet1_ratio_scenario_1 = get_scenario_cet1_ratio(scenario_1)
+updated_cet1_ratio_scenario_2 = get_scenario_cet1_ratio(scenario_2)
 
 # Display Comparison
 st.metric(
@@ -279,9 +256,8 @@ st.markdown("""
 - **Custom Scenario**: User-defined stress parameters.
 """)
 
-# Footer with Right Alignment and Enhanced Effects
-st.markdown(
-    """
+# Footer with Right Alignment and Enhanced Effects, sent to the frontend as a single block
+FOOTER_HTML = """
     <style>
     .footer {
         position: fixed; 
@@ -314,12 +290,6 @@ st.markdown(
         transform: scale(1.2);
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
-
-st.markdown(
-    """
     <div class="footer">
         <div>
             Created by <a href="#">Chinmay Yadav</a>
@@ -333,13 +303,8 @@ st.markdown(
             </a>
         </div>
     </div>
-    """,
-    unsafe_allow_html=True
-)
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css">
+    """
 
-# Add Font Awesome for Icons
-st.markdown(
-    '<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css">',
-    unsafe_allow_html=True
-)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
 